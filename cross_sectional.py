@@ -0,0 +1,201 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MIN_OBSERVATIONS = 3
+CACHE_SIZE = 8
+
+# Streamlit serves sessions from several threads, so the cache is locked
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def build_panel(portfolio_history, metrics_list):
+    """Align per-ticker metric histories into a (date, ticker, metric) array.
+
+    Fiscal quarter ends differ between companies, so dates are bucketed into
+    calendar quarters; the latest observation in each quarter is kept.
+    """
+    tickers = sorted(portfolio_history)
+    series = {}
+    for ticker in tickers:
+        for metric in metrics_list:
+            historical_data = portfolio_history[ticker].get(metric)
+            if historical_data is None or historical_data.empty:
+                continue
+            values = pd.to_numeric(historical_data['value'], errors='coerce')
+            quarters = pd.to_datetime(historical_data['date']).dt.to_period('Q')
+            series[(ticker, metric)] = (
+                pd.Series(values.values, index=quarters.values).sort_index()
+                .groupby(level=0).last()
+            )
+
+    dates = sorted(set().union(*(s.index for s in series.values()))) if series else []
+    date_index = pd.PeriodIndex(dates, freq='Q')
+    panel = np.full((len(dates), len(tickers), len(metrics_list)), np.nan)
+    for (ticker, metric), s in series.items():
+        panel[:, tickers.index(ticker), metrics_list.index(metric)] = (
+            s.reindex(date_index).to_numpy(dtype=float)
+        )
+
+    return date_index, tickers, list(metrics_list), panel
+
+
+def percentile_ranks(panel):
+    """Percentile rank of each ticker within its date/metric cross-section.
+
+    Ranks are in (0, 1] and tied values share their average rank, matching
+    DataFrame.rank(pct=True). Missing values and cross-sections with fewer
+    than MIN_OBSERVATIONS tickers are NaN.
+    """
+    n_tickers = panel.shape[1]
+    valid = ~np.isnan(panel)
+    # NaNs sort last, so ranks of the valid entries are unaffected by them
+    order = np.argsort(panel, axis=1, kind='stable')
+    sorted_panel = np.take_along_axis(panel, order, axis=1)
+
+    # Tie groups are runs of equal values; each member gets the group's mean position
+    positions = np.arange(n_tickers).reshape(1, n_tickers, 1)
+    changed = sorted_panel[:, 1:] != sorted_panel[:, :-1]
+    edge = np.ones_like(changed[:, :1])
+    starts = np.concatenate([edge, changed], axis=1)
+    ends = np.concatenate([changed, edge], axis=1)
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    last = np.flip(
+        np.minimum.accumulate(np.flip(np.where(ends, positions, n_tickers), axis=1), axis=1),
+        axis=1
+    )
+
+    ranks = np.empty(panel.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=1)
+
+    counts = valid.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ranks = ranks / counts
+    ranks[~valid | (counts < MIN_OBSERVATIONS)] = np.nan
+    return ranks
+
+
+def metric_correlations(panel):
+    """Pairwise cross-sectional correlation between metrics for each date.
+
+    Each pair only uses tickers that report both metrics on that date; pairs
+    with fewer than MIN_OBSERVATIONS tickers or a constant metric are NaN,
+    matching DataFrame.corr(min_periods=MIN_OBSERVATIONS).
+    """
+    valid = ~np.isnan(panel)
+    x = np.where(valid, panel, 0.0)
+
+    # (date, ticker, metric i, metric j) mask of tickers reporting both metrics
+    mask = (valid[:, :, :, None] & valid[:, :, None, :]).astype(float)
+    n = mask.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (x[:, :, :, None] * mask).sum(axis=1) / n
+
+        # Centre on each pair's own means before summing, which avoids the
+        # cancellation of the single-pass formula for large or constant values
+        dx = (x[:, :, :, None] - mean[:, None, :, :]) * mask
+        dy = (x[:, :, None, :] - mean.transpose(0, 2, 1)[:, None, :, :]) * mask
+        cov = (dx * dy).sum(axis=1)
+        var_x = (dx * dx).sum(axis=1)
+        var_y = (dy * dy).sum(axis=1)
+        corr = cov / np.sqrt(var_x * var_y)
+
+    # Variances at rounding-error level mean the metric is constant
+    scale = np.abs(x[:, :, :, None] * mask).max(axis=1, initial=0.0)
+    tolerance = n * (16 * np.finfo(float).eps) ** 2
+    constant = (var_x <= tolerance * scale ** 2) | (var_y <= tolerance * scale.transpose(0, 2, 1) ** 2)
+
+    corr[(n < MIN_OBSERVATIONS) | constant] = np.nan
+    # Only trims rounding just past +/-1
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _fingerprint(dates, tickers, metrics, panel):
+    digest = hashlib.sha1()
+    digest.update(repr((list(dates.astype(str)), tickers, metrics)).encode())
+    digest.update(np.ascontiguousarray(panel).tobytes())
+    return digest.hexdigest()
+
+
+def analyze_portfolio(portfolio_history, metrics_list):
+    """Cross-sectional percentile ranks and metric correlations for a universe.
+
+    `portfolio_history` maps ticker -> metric -> DataFrame of date/value, as
+    returned by MetricsTracker.get_historical_data. Results are cached until
+    the underlying data changes.
+
+    Everything runs as a few vectorized passes over the whole panel, which is
+    cheap even for large universes, so no worker processes are used; forking
+    the multi-threaded Streamlit server would not be safe anyway.
+    """
+    dates, tickers, metrics, panel = build_panel(portfolio_history, metrics_list)
+    key = _fingerprint(dates, tickers, metrics, panel)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    if panel.size:
+        ranks = percentile_ranks(panel)
+        correlations = metric_correlations(panel)
+    else:
+        ranks = panel.copy()
+        correlations = np.full((len(dates), len(metrics), len(metrics)), np.nan)
+
+    with np.errstate(invalid='ignore'):
+        # Dates with too few reporters are NaN and drop out of the average
+        counts = (~np.isnan(correlations)).sum(axis=0)
+        mean_correlation = np.where(
+            counts > 0, np.nansum(correlations, axis=0) / np.maximum(counts, 1), np.nan
+        )
+
+    result = {
+        'dates': dates,
+        'tickers': tickers,
+        'metrics': metrics,
+        'ranks': ranks,
+        'correlations': correlations,
+        'mean_correlation': mean_correlation,
+    }
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def latest_rank_date(result):
+    """Most recent quarter with enough reporters to rank any metric."""
+    ranked = ~np.isnan(result['ranks']).all(axis=(1, 2))
+    if not ranked.any():
+        return None
+    return result['dates'][np.flatnonzero(ranked)[-1]]
+
+
+def ranks_frame(result, date=None):
+    """Percentile ranks per ticker and metric for one quarter, the latest by default.
+
+    Every cell comes from the same quarter, so tickers are only compared with
+    peers that reported for that period.
+    """
+    if date is None:
+        date = latest_rank_date(result)
+    if date is None:
+        matrix = np.full((len(result['tickers']), len(result['metrics'])), np.nan)
+    else:
+        matrix = result['ranks'][result['dates'].get_loc(pd.Period(date, freq='Q'))]
+    return pd.DataFrame(matrix, index=result['tickers'], columns=result['metrics'])
+
+
+def correlation_frame(result, date=None):
+    """Metric correlation matrix, averaged over time unless a date is given."""
+    if date is None:
+        matrix = result['mean_correlation']
+    else:
+        matrix = result['correlations'][result['dates'].get_loc(pd.Period(date, freq='Q'))]
+    return pd.DataFrame(matrix, index=result['metrics'], columns=result['metrics'])
@@ -7,6 +7,15 @@ from datetime import datetime, timedelta
 import plotly.graph_objects as go
 import plotly.express as px
 
+from cross_sectional import (
+    MIN_OBSERVATIONS, analyze_portfolio, correlation_frame, latest_rank_date, ranks_frame
+)
+from providers import HEDGED_FIELDS, HedgedFetcher, IntrinioProvider, YFinanceProvider
+from snapshots import (
+    SNAPSHOT_DIR, build_chart, build_ticker_snapshot, fetch_ticker_inputs, load_manifest,
+    load_ticker_snapshot
+)
+
 # Configure Intrinio API
 intrinio_sdk.ApiClient().configuration.api_key['api_key'] = st.secrets["INTRINIO_API_KEY"]
 security_api = intrinio_sdk.SecurityApi()
@@ -21,8 +30,18 @@ PORTFOLIO = [
 ]
 
 
+@st.cache_resource
+def get_hedged_fetcher():
+    # Cached so provider latency stats persist across reruns
+    return HedgedFetcher(IntrinioProvider(security_api), YFinanceProvider())
+
+
 class MetricsTracker:
-    def __init__(self):
+    def __init__(self, fetcher=None):
+        self.fetcher = fetcher
+        # History always comes from Intrinio; sources records who supplied each current value
+        self.history_source = IntrinioProvider.name
+        self.sources = {}
         self.metrics_list = [
             'pe_ratio', 'ev_to_ebitda', 'price_to_book_value', 'ev_to_sales',
             'gross_margin', 'operating_margin', 'ebitda_margin', 'net_margin',
@@ -77,8 +96,11 @@ class MetricsTracker:
 
     def get_current_metrics(self, ticker):
         try:
-            metrics = {}
+            # Overlapping fields come from whichever provider answers first
+            metrics, sources = self.fetcher.fetch(ticker) if self.fetcher else ({}, {})
             for metric in self.metrics_list:
+                if self.fetcher and metric in HEDGED_FIELDS:
+                    continue
                 data = security_api.get_security_historical_data(
                     ticker,
                     metric,
@@ -87,6 +109,8 @@ class MetricsTracker:
                 )
                 if data.historical_data:
                     metrics[metric] = data.historical_data[-1].value
+                    sources[metric] = self.history_source
+            self.sources[ticker] = sources
             return metrics
         except ApiException as e:
             st.error(f"Error fetching current metrics for {ticker}: {e}")
@@ -96,8 +120,6 @@ class MetricsTracker:
 def main():
     st.title("Portfolio Metrics Monitor")
 
-    tracker = MetricsTracker()
-
     # Sidebar for filtering
     st.sidebar.header("Filters")
     selected_sectors = st.sidebar.multiselect(
@@ -105,6 +127,26 @@ def main():
         options=list(set(stock[0] for stock in PORTFOLIO))
     )
 
+    manifest = load_manifest(SNAPSHOT_DIR)
+    use_snapshots = st.sidebar.checkbox(
+        "Serve from snapshots",
+        value=manifest is not None,
+        disabled=manifest is None,
+        help=f"Run `python snapshots.py` to export snapshots to {SNAPSHOT_DIR}"
+    )
+    if manifest is not None:
+        st.sidebar.caption(f"Snapshot version: {manifest['version']}")
+
+    hedged = st.sidebar.checkbox(
+        "Hedged fetching",
+        help="Race yfinance against Intrinio for overlapping fields when Intrinio is slow"
+    )
+    fetcher = get_hedged_fetcher() if hedged else None
+    tracker = MetricsTracker(fetcher)
+    if fetcher is not None:
+        st.sidebar.caption(f"Hedge deadline: {fetcher.deadline():.2f}s")
+        st.sidebar.dataframe(pd.DataFrame(fetcher.summary()).T)
+
     # Main content
     col1, col2 = st.columns(2)
 
@@ -127,25 +169,27 @@ def main():
     # Metrics Analysis
     st.header("Detailed Metrics Analysis")
 
+    portfolio_history = {}
     for sector, industry, ticker in filtered_portfolio:
         with st.expander(f"{ticker} - {industry} ({sector})"):
-            current_metrics = tracker.get_current_metrics(ticker)
-
-            if current_metrics:
-                metrics_df = pd.DataFrame([current_metrics]).T
+            # Prefer the prebuilt snapshot; fall back to building the view live
+            view = load_ticker_snapshot(ticker, manifest, SNAPSHOT_DIR) if use_snapshots else None
+            if view is None:
+                inputs = fetch_ticker_inputs(tracker, ticker)
+                if inputs['current']:
+                    view = build_ticker_snapshot(tracker, ticker, inputs, with_charts=False)
+
+            if view:
+                metrics_df = pd.DataFrame([view['metrics']]).T
                 metrics_df.columns = ['Current Value']
-
-                # Calculate historical deviations
-                deviations = {}
-                for metric in tracker.metrics_list:
-                    if metric in current_metrics:
-                        historical_data = tracker.get_historical_data(ticker, metric)
-                        metric_deviations = tracker.calculate_deviations(
-                            historical_data,
-                            current_metrics[metric]
-                        )
-                        if metric_deviations:
-                            deviations[metric] = metric_deviations
+                sources = view.get('sources', {})
+                metrics_df['Source'] = [
+                    sources.get(metric, tracker.history_source) for metric in metrics_df.index
+                ]
+                deviations = view['deviations']
+                portfolio_history[ticker] = {
+                    metric: pd.DataFrame(series) for metric, series in view['history'].items()
+                }
 
                 # Display metrics and deviations
                 col1, col2 = st.columns(2)
@@ -163,6 +207,13 @@ def main():
                                     f"{metric}: {deviation:.2f}σ deviation from "
                                     f"{period} average"
                                 )
+                    other_sources = sorted(
+                        metric for metric, source in sources.items() if source != tracker.history_source
+                    )
+                    if other_sources:
+                        st.caption(
+                            "Not compared against Intrinio history: " + ", ".join(other_sources)
+                        )
 
                 # Historical trends visualization
                 st.subheader("Historical Trends")
@@ -172,15 +223,40 @@ def main():
                     key=f"metric_select_{ticker}"
                 )
 
-                historical_data = tracker.get_historical_data(ticker, metric_to_plot)
-                if not historical_data.empty:
-                    fig = px.line(
-                        historical_data,
-                        x='date',
-                        y='value',
-                        title=f"{metric_to_plot} Historical Trend"
-                    )
-                    st.plotly_chart(fig)
+                chart = view['charts'].get(metric_to_plot)
+                if chart is None and metric_to_plot in portfolio_history[ticker]:
+                    chart = build_chart(metric_to_plot, portfolio_history[ticker][metric_to_plot])
+                if chart:
+                    st.plotly_chart(chart)
+
+    # Cross-sectional analytics
+    st.header("Cross-Sectional Analytics")
+    if len(portfolio_history) >= MIN_OBSERVATIONS:
+        cross_section = analyze_portfolio(portfolio_history, tracker.metrics_list)
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("Metric Correlations")
+            correlations = correlation_frame(cross_section).dropna(how='all').dropna(axis=1, how='all')
+            if not correlations.empty:
+                fig = px.imshow(
+                    correlations,
+                    zmin=-1,
+                    zmax=1,
+                    color_continuous_scale='RdBu',
+                    title="Average cross-sectional correlation"
+                )
+                st.plotly_chart(fig)
+
+        with col2:
+            rank_date = latest_rank_date(cross_section)
+            st.subheader(f"Percentile Ranks vs. Peers ({rank_date})" if rank_date else "Percentile Ranks vs. Peers")
+            st.dataframe(ranks_frame(cross_section, rank_date).dropna(axis=1, how='all'))
+    else:
+        st.info(
+            f"Select at least {MIN_OBSERVATIONS} tickers to compare metrics across the portfolio."
+        )
 
 
 if __name__ == "__main__":
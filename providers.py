@@ -0,0 +1,234 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+
+import numpy as np
+import yfinance as yf
+
+# Common schema for fields both providers report, keyed by the Intrinio tag used
+# in metrics_list. Intrinio's units are the reference, since history comes from it.
+HEDGED_FIELDS = {
+    'pe_ratio': 'multiple',
+    'forward_pe_ratio': 'multiple',
+    'price_to_book_value': 'multiple',
+    'ev_to_ebitda': 'multiple',
+    'ev_to_sales': 'multiple',
+    'gross_margin': 'fraction',
+    'operating_margin': 'fraction',
+    'ebitda_margin': 'fraction',
+    'net_margin': 'fraction',
+    'dividend_yield': 'fraction',
+}
+
+
+def normalize(raw, conversions):
+    """Convert a provider's raw answer to the common schema.
+
+    `conversions` maps each schema field to the provider's (key, scale); only
+    finite numeric values are kept.
+    """
+    values = {}
+    for field, (key, scale) in conversions.items():
+        try:
+            value = float(raw.get(key))
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(value):
+            values[field] = value * scale
+    return values
+
+
+class IntrinioProvider:
+    name = 'intrinio'
+    conversions = {field: (field, 1.0) for field in HEDGED_FIELDS}
+
+    def __init__(self, security_api):
+        self.security_api = security_api
+
+    def fetch(self, ticker):
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=30)
+        raw = {}
+        for field in HEDGED_FIELDS:
+            data = self.security_api.get_security_historical_data(
+                ticker,
+                field,
+                start_date=start_date.strftime('%Y-%m-%d'),
+                end_date=end_date.strftime('%Y-%m-%d')
+            )
+            if data.historical_data:
+                raw[field] = data.historical_data[-1].value
+        return raw
+
+
+class YFinanceProvider:
+    name = 'yfinance'
+    conversions = {
+        'pe_ratio': ('trailingPE', 1.0),
+        'forward_pe_ratio': ('forwardPE', 1.0),
+        'price_to_book_value': ('priceToBook', 1.0),
+        'ev_to_ebitda': ('enterpriseToEbitda', 1.0),
+        'ev_to_sales': ('enterpriseToRevenue', 1.0),
+        'gross_margin': ('grossMargins', 1.0),
+        'operating_margin': ('operatingMargins', 1.0),
+        'ebitda_margin': ('ebitdaMargins', 1.0),
+        'net_margin': ('profitMargins', 1.0),
+        # dividendYield is forward-looking and reported in percent; the trailing
+        # fraction matches Intrinio's definition and units
+        'dividend_yield': ('trailingAnnualDividendYield', 1.0),
+    }
+
+    def fetch(self, ticker):
+        return yf.Ticker(ticker).info
+
+
+class LocalProvider:
+    """Stand-in provider with a fixed latency, for exercising HedgedFetcher"""
+
+    conversions = {field: (field, 1.0) for field in HEDGED_FIELDS}
+
+    def __init__(self, name, values, latency=0.0, fail=False):
+        self.name = name
+        self.values = values
+        self.latency = latency
+        self.fail = fail
+
+    def fetch(self, ticker):
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed for {ticker}")
+        return dict(self.values)
+
+
+class ProviderStats:
+    def __init__(self, window=200):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.wins = 0
+        self.errors = 0
+
+    def percentile(self, q):
+        return float(np.percentile(self.latencies, q)) if self.latencies else None
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'wins': self.wins,
+            'win_rate': self.wins / self.requests if self.requests else None,
+            'errors': self.errors,
+            'p50_latency': self.percentile(50),
+            'p95_latency': self.percentile(95),
+        }
+
+
+class HedgedFetcher:
+    """Fetch the hedged fields from a primary provider, hedging to a secondary.
+
+    The secondary is only asked once the primary has failed or not replied
+    within a deadline tracking the primary's observed p95 latency. Once the
+    primary answers its fields are kept, with any gaps filled from a secondary
+    answer already in hand; a complete secondary answer that arrives first
+    wins outright. Nothing waits longer than total_timeout.
+    """
+
+    def __init__(self, primary, secondary, quantile=95, initial_deadline=2.0,
+                 min_deadline=0.1, max_deadline=10.0, total_timeout=15.0, min_samples=20,
+                 max_workers=8):
+        self.primary = primary
+        self.secondary = secondary
+        self.quantile = quantile
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.total_timeout = total_timeout
+        self.min_samples = min_samples
+        self.hedges = 0
+        self.stats = {provider.name: ProviderStats() for provider in (primary, secondary)}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def deadline(self):
+        stats = self.stats[self.primary.name]
+        with self._lock:
+            if len(stats.latencies) < self.min_samples:
+                return self.initial_deadline
+            p = stats.percentile(self.quantile)
+        return min(max(p, self.min_deadline), self.max_deadline)
+
+    def _call(self, provider, ticker):
+        stats = self.stats[provider.name]
+        start = time.perf_counter()
+        try:
+            values = normalize(provider.fetch(ticker), provider.conversions)
+        except Exception:
+            with self._lock:
+                stats.errors += 1
+            raise
+        # Losing requests still finish and feed the latency window
+        with self._lock:
+            stats.latencies.append(time.perf_counter() - start)
+        return values
+
+    def _submit(self, provider, ticker):
+        with self._lock:
+            self.stats[provider.name].requests += 1
+        return self._executor.submit(self._call, provider, ticker)
+
+    def fetch(self, ticker):
+        """Return (values, sources), where sources names the provider of each field"""
+        start = time.perf_counter()
+        deadline = self.deadline()
+        futures = {self._submit(self.primary, ticker): self.primary}
+        answers = {}
+        hedged = False
+
+        while futures:
+            remaining = self.total_timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                break
+            done, _ = wait(
+                futures,
+                timeout=remaining if hedged else min(deadline, remaining),
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                provider = futures.pop(future)
+                if future.exception() is None and future.result():
+                    answers[provider.name] = future.result()
+
+            if self.primary.name in answers:
+                break
+            secondary = answers.get(self.secondary.name, {})
+            if set(self.secondary.conversions) <= set(secondary):
+                break
+
+            # The primary timed out or failed
+            if not hedged:
+                with self._lock:
+                    self.hedges += 1
+                futures[self._submit(self.secondary, ticker)] = self.secondary
+                hedged = True
+
+        if not answers:
+            return {}, {}
+
+        winner = self.primary if self.primary.name in answers else self.secondary
+        with self._lock:
+            self.stats[winner.name].wins += 1
+
+        # The winner's fields are kept; the other answer, if any, only fills gaps
+        values, sources = {}, {}
+        for provider in (winner, self.secondary if winner is self.primary else self.primary):
+            for field, value in answers.get(provider.name, {}).items():
+                if field not in values:
+                    values[field] = value
+                    sources[field] = provider.name
+        return values, sources
+
+    def summary(self):
+        with self._lock:
+            return {name: stats.summary() for name, stats in self.stats.items()}
+
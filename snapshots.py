@@ -0,0 +1,231 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+
+# Shared by the exporter and the dashboard; set SNAPSHOT_DIR to move both
+SNAPSHOT_DIR = os.environ.get(
+    "SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+)
+MANIFEST_FILE = "manifest.json"
+# <ticker>-<data date>-<input hash>.json.gz, as written by export_snapshots
+SNAPSHOT_FILE = re.compile(r'^(?P<ticker>.+)-(\d{4}-\d{2}-\d{2}|undated)-[0-9a-f]{12}\.json\.gz$')
+
+
+def fetch_ticker_inputs(tracker, ticker):
+    """Fetch everything a ticker's view is built from"""
+    current_metrics = tracker.get_current_metrics(ticker)
+    history = {}
+    if current_metrics:
+        for metric in tracker.metrics_list:
+            historical_data = tracker.get_historical_data(ticker, metric)
+            if not historical_data.empty:
+                history[metric] = historical_data
+
+    sources = dict(tracker.sources.get(ticker, {}))
+    return {'current': current_metrics, 'sources': sources, 'history': history}
+
+
+def _serialize_history(history):
+    return {
+        metric: {
+            'date': [str(date) for date in historical_data['date']],
+            'value': [None if pd.isna(value) else float(value) for value in historical_data['value']]
+        }
+        for metric, historical_data in history.items()
+    }
+
+
+def input_fingerprint(inputs):
+    """Stable hash of a ticker's inputs, used to skip unchanged rebuilds"""
+    payload = json.dumps(
+        {
+            'current': inputs['current'],
+            'sources': inputs['sources'],
+            'history': _serialize_history(inputs['history'])
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def build_chart(metric, historical_data):
+    """Build the Plotly spec for a metric's historical trend"""
+    fig = px.line(
+        historical_data,
+        x='date',
+        y='value',
+        title=f"{metric} Historical Trend"
+    )
+    return json.loads(fig.to_json())
+
+
+def build_ticker_snapshot(tracker, ticker, inputs, with_charts=True):
+    """Build a ticker's metric table, deviations and chart specs.
+
+    The live dashboard path passes with_charts=False and builds only the chart
+    being viewed; exports prebuild every chart.
+    """
+    current_metrics = inputs['current']
+    sources = inputs['sources']
+    history = _serialize_history(inputs['history'])
+
+    deviations = {}
+    for metric, value in current_metrics.items():
+        # A value from another provider isn't comparable with the history's provider
+        if sources.get(metric, tracker.history_source) != tracker.history_source:
+            continue
+        if metric in inputs['history']:
+            metric_deviations = tracker.calculate_deviations(inputs['history'][metric], value)
+            if metric_deviations:
+                deviations[metric] = metric_deviations
+
+    charts = {}
+    if with_charts:
+        for metric, historical_data in inputs['history'].items():
+            charts[metric] = build_chart(metric, historical_data)
+
+    dates = [date for series in history.values() for date in series['date']]
+
+    return {
+        'ticker': ticker,
+        'data_timestamp': max(dates) if dates else None,
+        'metrics': current_metrics,
+        'sources': sources,
+        'deviations': deviations,
+        'history': history,
+        'charts': charts
+    }
+
+
+def _write_json(path, data, compress=True):
+    # Write to a temp file first so readers never see a partial snapshot
+    tmp_path = f"{path}.tmp"
+    opener = gzip.open if compress else open
+    with opener(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), default=str)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(snapshot_dir=SNAPSHOT_DIR):
+    """Load the snapshot manifest, or None if no export has been run"""
+    path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_ticker_snapshot(ticker, manifest, snapshot_dir=SNAPSHOT_DIR):
+    """Read a ticker's prebuilt view from disk, or None if it has no snapshot"""
+    entry = manifest['tickers'].get(ticker) if manifest else None
+    if entry is None:
+        return None
+
+    path = os.path.join(snapshot_dir, entry['file'])
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _remove_stale_files(snapshot_dir, previous, entries, tickers):
+    # Only touch files this exporter wrote, so a shared directory is safe
+    current_files = {entry['file'] for entry in entries.values()}
+    stale = {entry['file'] for entry in previous.values()} - current_files
+    for file_name in os.listdir(snapshot_dir):
+        if file_name.endswith('.tmp'):
+            # Left behind by an export that crashed mid-write
+            target = file_name[:-len('.tmp')]
+            if target == MANIFEST_FILE or SNAPSHOT_FILE.match(target):
+                stale.add(file_name)
+            continue
+        match = SNAPSHOT_FILE.match(file_name)
+        if match and match.group('ticker') in tickers and file_name not in current_files:
+            stale.add(file_name)
+
+    for file_name in stale:
+        path = os.path.join(snapshot_dir, file_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def export_snapshots(tracker, tickers, snapshot_dir=SNAPSHOT_DIR):
+    """Prebuild snapshot files for the given tickers.
+
+    Only tickers whose inputs changed since the last export are rebuilt. The
+    export is versioned by the latest data timestamp across all tickers.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    previous = (load_manifest(snapshot_dir) or {}).get('tickers', {})
+
+    entries = {}
+    rebuilt = []
+    for ticker in tickers:
+        inputs = fetch_ticker_inputs(tracker, ticker)
+        if not inputs['current']:
+            # Keep serving the last good snapshot if the fetch failed
+            if ticker in previous:
+                entries[ticker] = previous[ticker]
+            continue
+
+        input_hash = input_fingerprint(inputs)
+        entry = previous.get(ticker)
+        if (entry and entry['input_hash'] == input_hash
+                and os.path.exists(os.path.join(snapshot_dir, entry['file']))):
+            entries[ticker] = entry
+            continue
+
+        snapshot = build_ticker_snapshot(tracker, ticker, inputs)
+        data_timestamp = snapshot['data_timestamp']
+        file_date = data_timestamp[:10] if data_timestamp else 'undated'
+        file_name = f"{ticker}-{file_date}-{input_hash[:12]}.json.gz"
+        _write_json(os.path.join(snapshot_dir, file_name), snapshot)
+
+        entries[ticker] = {
+            'file': file_name,
+            'input_hash': input_hash,
+            'data_timestamp': data_timestamp
+        }
+        rebuilt.append(ticker)
+
+    timestamps = [entry['data_timestamp'] for entry in entries.values() if entry['data_timestamp']]
+    manifest = {
+        'version': max(timestamps) if timestamps else None,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'rebuilt': rebuilt,
+        'tickers': entries
+    }
+    _write_json(os.path.join(snapshot_dir, MANIFEST_FILE), manifest, compress=False)
+
+    _remove_stale_files(snapshot_dir, previous, entries, tickers)
+
+    return manifest
+
+
+if __name__ == "__main__":
+    from dashboard import MetricsTracker, PORTFOLIO
+
+    parser = argparse.ArgumentParser(description="Export precomputed dashboard snapshots")
+    parser.add_argument(
+        "--out",
+        default=SNAPSHOT_DIR,
+        help="Snapshot directory (defaults to $SNAPSHOT_DIR, which the dashboard reads)"
+    )
+    args = parser.parse_args()
+
+    manifest = export_snapshots(
+        MetricsTracker(),
+        [ticker for _, _, ticker in PORTFOLIO],
+        args.out
+    )
+    print(f"Snapshot version {manifest['version']}: "
+          f"rebuilt {', '.join(manifest['rebuilt']) or 'nothing'}")
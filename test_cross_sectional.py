@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cross_sectional import (
+    MIN_OBSERVATIONS, analyze_portfolio, latest_rank_date, metric_correlations,
+    percentile_ranks, ranks_frame
+)
+
+
+def make_panel(seed, n_dates=4, n_tickers=12, n_metrics=4):
+    rng = np.random.default_rng(seed)
+    panel = rng.normal(size=(n_dates, n_tickers, n_metrics))
+    # Ties, including a whole block of zeros like non-dividend payers
+    panel[:, :, 1] = rng.integers(0, 3, size=(n_dates, n_tickers))
+    panel[:, :4, 2] = 0.0
+    # A constant metric and one far from zero
+    panel[:, :, 3] = 0.7
+    panel[0, :, 0] = 1e8 + rng.normal(size=n_tickers)
+    panel[rng.random(panel.shape) < 0.25] = np.nan
+    # A cross-section with too few reporters
+    panel[1, 2:, 2] = np.nan
+    return panel
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_percentile_ranks_match_pandas(seed):
+    panel = make_panel(seed)
+    ranks = percentile_ranks(panel)
+
+    for d in range(panel.shape[0]):
+        for m in range(panel.shape[2]):
+            column = pd.Series(panel[d, :, m])
+            expected = column.rank(pct=True).to_numpy(copy=True)
+            if column.count() < MIN_OBSERVATIONS:
+                expected[:] = np.nan
+            np.testing.assert_allclose(ranks[d, :, m], expected, equal_nan=True)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_metric_correlations_match_pandas(seed):
+    panel = make_panel(seed)
+    correlations = metric_correlations(panel)
+
+    for d in range(panel.shape[0]):
+        # Correlation is shift invariant; centring keeps pandas' own result exact
+        frame = pd.DataFrame(panel[d])
+        expected = (frame - frame.mean()).corr(min_periods=MIN_OBSERVATIONS).to_numpy()
+        np.testing.assert_allclose(correlations[d], expected, atol=1e-9, equal_nan=True)
+
+
+def test_constant_metric_has_no_correlation():
+    panel = np.array([[[0.7, 1.0], [0.7, 2.0], [0.7, 4.0]]])
+
+    correlations = metric_correlations(panel)
+
+    assert np.isnan(correlations[0, 0]).all()
+    assert correlations[0, 1, 1] == pytest.approx(1.0)
+
+
+def test_latest_ranks_skip_lone_early_reporter():
+    history = {
+        ticker: {'pe_ratio': pd.DataFrame({'date': ['2026-03-31', '2026-06-30'], 'value': [1.0, value]})}
+        for ticker, value in [('A', 1.0), ('B', 2.0), ('C', 2.0)]
+    }
+    history['D'] = {'pe_ratio': pd.DataFrame({'date': ['2026-09-30'], 'value': [5.0]})}
+
+    result = analyze_portfolio(history, ['pe_ratio'])
+
+    assert latest_rank_date(result) == pd.Period('2026Q2', freq='Q')
+    ranks = ranks_frame(result)['pe_ratio']
+    assert ranks['A'] == pytest.approx(1 / 3)
+    assert ranks['B'] == ranks['C'] == pytest.approx(5 / 6)
+    assert np.isnan(ranks['D'])
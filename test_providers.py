@@ -0,0 +1,140 @@
+import time
+
+import numpy as np
+import pytest
+
+from providers import HEDGED_FIELDS, HedgedFetcher, LocalProvider
+
+FULL = {field: 1.0 for field in HEDGED_FIELDS}
+SECONDARY = {field: 2.0 for field in HEDGED_FIELDS}
+
+
+def test_fast_primary_is_not_hedged():
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', FULL),
+        LocalProvider('secondary', SECONDARY),
+        initial_deadline=5.0
+    )
+
+    values, sources = fetcher.fetch('TEST')
+
+    assert values == FULL
+    assert set(sources.values()) == {'primary'}
+    assert fetcher.hedges == 0
+    assert fetcher.stats['secondary'].requests == 0
+    assert fetcher.stats['primary'].wins == 1
+
+
+def test_hedge_fires_after_deadline():
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', FULL, latency=1.0),
+        LocalProvider('secondary', SECONDARY),
+        initial_deadline=0.05
+    )
+
+    values, sources = fetcher.fetch('TEST')
+
+    assert values == SECONDARY
+    assert set(sources.values()) == {'secondary'}
+    assert fetcher.hedges == 1
+    assert fetcher.stats['secondary'].wins == 1
+    assert fetcher.stats['primary'].wins == 0
+
+
+def test_primary_failure_hedges_at_once():
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', FULL, fail=True),
+        LocalProvider('secondary', SECONDARY),
+        initial_deadline=10.0
+    )
+
+    start = time.perf_counter()
+    values, _ = fetcher.fetch('TEST')
+
+    # Far below the deadline, so the hedge did not wait for it
+    assert time.perf_counter() - start < 5.0
+    assert values == SECONDARY
+    assert fetcher.hedges == 1
+    assert fetcher.stats['primary'].errors == 1
+    assert fetcher.stats['secondary'].wins == 1
+
+
+def test_partial_primary_answer_is_kept_without_hedging():
+    partial = {field: 1.0 for field in HEDGED_FIELDS if field != 'dividend_yield'}
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', partial),
+        LocalProvider('secondary', SECONDARY),
+        initial_deadline=5.0
+    )
+
+    values, sources = fetcher.fetch('TEST')
+
+    assert values == partial
+    assert set(sources.values()) == {'primary'}
+    assert fetcher.hedges == 0
+    assert fetcher.stats['secondary'].requests == 0
+    assert fetcher.stats['primary'].wins == 1
+
+
+def test_late_primary_fills_gaps_in_partial_secondary():
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', {'pe_ratio': 1.0}, latency=0.3),
+        LocalProvider('secondary', {'pe_ratio': 2.0, 'net_margin': 0.2}),
+        initial_deadline=0.05
+    )
+
+    values, sources = fetcher.fetch('TEST')
+
+    assert values == {'pe_ratio': 1.0, 'net_margin': 0.2}
+    assert sources == {'pe_ratio': 'primary', 'net_margin': 'secondary'}
+    assert fetcher.stats['primary'].wins == 1
+    assert fetcher.stats['secondary'].wins == 0
+
+
+def test_hung_primary_is_bounded_by_total_timeout():
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', FULL, latency=2.0),
+        LocalProvider('secondary', {'pe_ratio': 2.0}),
+        initial_deadline=0.05,
+        total_timeout=0.2
+    )
+
+    start = time.perf_counter()
+    values, sources = fetcher.fetch('TEST')
+
+    assert time.perf_counter() - start < 1.5
+    assert values == {'pe_ratio': 2.0}
+    assert sources == {'pe_ratio': 'secondary'}
+    assert fetcher.stats['secondary'].wins == 1
+
+
+def test_both_failing_returns_empty():
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', FULL, fail=True),
+        LocalProvider('secondary', SECONDARY, fail=True),
+    )
+
+    assert fetcher.fetch('TEST') == ({}, {})
+    assert fetcher.stats['primary'].errors == 1
+    assert fetcher.stats['secondary'].errors == 1
+    assert fetcher.stats['primary'].wins == fetcher.stats['secondary'].wins == 0
+
+
+def test_deadline_follows_p95_after_min_samples():
+    fetcher = HedgedFetcher(
+        LocalProvider('primary', FULL, latency=0.02),
+        LocalProvider('secondary', SECONDARY),
+        initial_deadline=30.0,
+        min_deadline=0.0,
+        min_samples=5
+    )
+
+    for _ in range(4):
+        fetcher.fetch('TEST')
+    assert fetcher.deadline() == 30.0
+
+    fetcher.fetch('TEST')
+    latencies = fetcher.stats['primary'].latencies
+    assert len(latencies) == 5
+    assert fetcher.deadline() == pytest.approx(np.percentile(latencies, 95))
+    assert fetcher.hedges == 0